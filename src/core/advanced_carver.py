@@ -2,63 +2,100 @@
 """Advanced file carving with multiple techniques"""
 
 import os
+import mmap
 import struct
-import magic
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, Optional
 from rich.console import Console
 from rich.progress import track
+from rich.table import Table
 import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property, lru_cache
+
+from core.file_access import fadvise, map_file
+from core.signature_scanner import SignatureScanner
 
 console = Console()
 
+# Carved files are hashed and written in pieces of this size
+CARVE_CHUNK_SIZE = 1024 * 1024
+
+# How far past a header to look for the format's trailer
+TRAILER_SEARCH_LIMIT = 64 * 1024 * 1024
+
+# Carve sizes for formats without a trailer, or whose trailer was not found
+FIXED_CARVE_SIZES = {
+    'jpg': 1024 * 1024,
+    'png': 1024 * 1024,
+    'gif': 1024 * 1024,
+    'pdf': 10 * 1024 * 1024,
+    'zip': 5 * 1024 * 1024,
+    'rar': 5 * 1024 * 1024,
+}
+DEFAULT_CARVE_SIZE = 512 * 1024
+
+@lru_cache(maxsize=1)
+def _load_signatures() -> Dict[bytes, Dict]:
+    """Load comprehensive file signatures database"""
+    signatures = {
+        # Images
+        b'\xFF\xD8\xFF\xE0': {'ext': 'jpg', 'type': 'image', 'description': 'JPEG Image'},
+        b'\xFF\xD8\xFF\xE1': {'ext': 'jpg', 'type': 'image', 'description': 'JPEG Image (EXIF)'},
+        b'\x89\x50\x4E\x47': {'ext': 'png', 'type': 'image', 'description': 'PNG Image'},
+        b'\x47\x49\x46\x38': {'ext': 'gif', 'type': 'image', 'description': 'GIF Image'},
+        b'\x42\x4D': {'ext': 'bmp', 'type': 'image', 'description': 'BMP Image'},
+        b'\x49\x49\x2A\x00': {'ext': 'tif', 'type': 'image', 'description': 'TIFF Image'},
+        
+        # Documents
+        b'\x25\x50\x44\x46': {'ext': 'pdf', 'type': 'document', 'description': 'PDF Document'},
+        b'\x50\x4B\x03\x04': {'ext': 'zip', 'type': 'archive', 'description': 'ZIP Archive (incl. DOCX/XLSX)'},
+        b'\x50\x4B\x05\x06': {'ext': 'zip', 'type': 'archive', 'description': 'ZIP Archive (empty)'},
+        b'\x50\x4B\x07\x08': {'ext': 'zip', 'type': 'archive', 'description': 'ZIP Archive (spanned)'},
+        b'\x52\x61\x72\x21': {'ext': 'rar', 'type': 'archive', 'description': 'RAR Archive'},
+        b'\x37\x7A\xBC\xAF': {'ext': '7z', 'type': 'archive', 'description': '7-Zip Archive'},
+        b'\xD0\xCF\x11\xE0': {'ext': 'doc', 'type': 'document', 'description': 'Microsoft Office'},
+        
+        # Audio/Video
+        b'\x49\x44\x33': {'ext': 'mp3', 'type': 'audio', 'description': 'MP3 Audio'},
+        b'\xFF\xFB': {'ext': 'mp3', 'type': 'audio', 'description': 'MP3 Audio (no ID3)'},
+        b'\x52\x49\x46\x46': {'ext': 'avi', 'type': 'video', 'description': 'AVI Video'},
+        b'\x66\x74\x79\x70': {'ext': 'mp4', 'type': 'video', 'description': 'MP4 Video'},
+        b'\x1A\x45\xDF\xA3': {'ext': 'mkv', 'type': 'video', 'description': 'Matroska Video'},
+        
+        # Executables
+        b'\x7F\x45\x4C\x46': {'ext': 'elf', 'type': 'executable', 'description': 'ELF Executable'},
+        b'\x4D\x5A': {'ext': 'exe', 'type': 'executable', 'description': 'Windows Executable'},
+        b'\xCA\xFE\xBA\xBE': {'ext': 'class', 'type': 'executable', 'description': 'Java Class'},
+        
+        # Database
+        b'\x53\x51\x4C\x69': {'ext': 'sqlite', 'type': 'database', 'description': 'SQLite Database'},
+        
+        # Text files with BOM
+        b'\xEF\xBB\xBF': {'ext': 'txt', 'type': 'text', 'description': 'UTF-8 Text'},
+        b'\xFF\xFE': {'ext': 'txt', 'type': 'text', 'description': 'UTF-16 LE Text'},
+        b'\xFE\xFF': {'ext': 'txt', 'type': 'text', 'description': 'UTF-16 BE Text'},
+    }
+    
+    # Hex forms for scan results and the capabilities table, computed once instead of per hit
+    for sig, info in signatures.items():
+        info['hex'] = sig.hex()
+        info['hex_upper'] = info['hex'].upper()
+    
+    return signatures
+
+@lru_cache(maxsize=1)
+def _build_scanner() -> SignatureScanner:
+    """Compile the signature table into a scanner once per process"""
+    return SignatureScanner(list(_load_signatures()))
+
 class AdvancedFileCarver:
     def __init__(self):
-        self.signatures = self._load_signatures()
-        self.mime = magic.Magic(mime=True)
+        self.signatures = _load_signatures()
+        # Metadata indexed by scanner signature id, so hits need no per-match dict lookup
+        self.signature_info = list(self.signatures.values())
+        self.scanner = _build_scanner()
         
-    def _load_signatures(self) -> Dict[bytes, Dict]:
-        """Load comprehensive file signatures database"""
-        return {
-            # Images
-            b'\xFF\xD8\xFF\xE0': {'ext': 'jpg', 'type': 'image', 'description': 'JPEG Image'},
-            b'\xFF\xD8\xFF\xE1': {'ext': 'jpg', 'type': 'image', 'description': 'JPEG Image (EXIF)'},
-            b'\x89\x50\x4E\x47': {'ext': 'png', 'type': 'image', 'description': 'PNG Image'},
-            b'\x47\x49\x46\x38': {'ext': 'gif', 'type': 'image', 'description': 'GIF Image'},
-            b'\x42\x4D': {'ext': 'bmp', 'type': 'image', 'description': 'BMP Image'},
-            b'\x49\x49\x2A\x00': {'ext': 'tif', 'type': 'image', 'description': 'TIFF Image'},
-            
-            # Documents
-            b'\x25\x50\x44\x46': {'ext': 'pdf', 'type': 'document', 'description': 'PDF Document'},
-            b'\x50\x4B\x03\x04': {'ext': 'zip', 'type': 'archive', 'description': 'ZIP Archive'},
-            b'\x50\x4B\x05\x06': {'ext': 'zip', 'type': 'archive', 'description': 'ZIP Archive (empty)'},
-            b'\x50\x4B\x07\x08': {'ext': 'zip', 'type': 'archive', 'description': 'ZIP Archive (spanned)'},
-            b'\x52\x61\x72\x21': {'ext': 'rar', 'type': 'archive', 'description': 'RAR Archive'},
-            b'\x37\x7A\xBC\xAF': {'ext': '7z', 'type': 'archive', 'description': '7-Zip Archive'},
-            b'\xD0\xCF\x11\xE0': {'ext': 'doc', 'type': 'document', 'description': 'Microsoft Office'},
-            b'\x50\x4B\x03\x04': {'ext': 'docx', 'type': 'document', 'description': 'Microsoft Office (new)'},
-            
-            # Audio/Video
-            b'\x49\x44\x33': {'ext': 'mp3', 'type': 'audio', 'description': 'MP3 Audio'},
-            b'\xFF\xFB': {'ext': 'mp3', 'type': 'audio', 'description': 'MP3 Audio (no ID3)'},
-            b'\x52\x49\x46\x46': {'ext': 'avi', 'type': 'video', 'description': 'AVI Video'},
-            b'\x66\x74\x79\x70': {'ext': 'mp4', 'type': 'video', 'description': 'MP4 Video'},
-            b'\x1A\x45\xDF\xA3': {'ext': 'mkv', 'type': 'video', 'description': 'Matroska Video'},
-            
-            # Executables
-            b'\x7F\x45\x4C\x46': {'ext': 'elf', 'type': 'executable', 'description': 'ELF Executable'},
-            b'\x4D\x5A': {'ext': 'exe', 'type': 'executable', 'description': 'Windows Executable'},
-            b'\xCA\xFE\xBA\xBE': {'ext': 'class', 'type': 'executable', 'description': 'Java Class'},
-            
-            # Database
-            b'\x53\x51\x4C\x69': {'ext': 'sqlite', 'type': 'database', 'description': 'SQLite Database'},
-            
-            # Text files with BOM
-            b'\xEF\xBB\xBF': {'ext': 'txt', 'type': 'text', 'description': 'UTF-8 Text'},
-            b'\xFF\xFE': {'ext': 'txt', 'type': 'text', 'description': 'UTF-16 LE Text'},
-            b'\xFE\xFF': {'ext': 'txt', 'type': 'text', 'description': 'UTF-16 BE Text'},
-        }
-    
     def quick_scan(self, source_path: str) -> Dict:
         """Perform quick signature-based scan"""
         console.print(f"[bold blue]🔍 Quick Scanning: {source_path}[/bold blue]")
@@ -70,21 +107,21 @@ class AdvancedFileCarver:
         found_files = []
         
         with open(source_path, 'rb') as f:
+            fadvise(f, 'POSIX_FADV_SEQUENTIAL')
+            
             # Read first 1MB for quick scan
             data = f.read(1024 * 1024)
             
-            for signature, info in self.signatures.items():
-                if signature in data:
-                    positions = self._find_all_occurrences(data, signature)
-                    for pos in positions:
-                        found_files.append({
-                            'signature': signature.hex(),
-                            'type': info['type'],
-                            'extension': info['ext'],
-                            'description': info['description'],
-                            'position': pos,
-                            'confidence': 'high'
-                        })
+            for pos, sig_id in self.scanner.scan(data):
+                info = self.signature_info[sig_id]
+                found_files.append({
+                    'signature': info['hex'],
+                    'type': info['type'],
+                    'extension': info['ext'],
+                    'description': info['description'],
+                    'position': pos,
+                    'confidence': 'high'
+                })
         
         return {
             'source': source_path,
@@ -102,37 +139,42 @@ class AdvancedFileCarver:
         output_path.mkdir(parents=True, exist_ok=True)
         
         recovered_files = []
-        file_size = os.path.getsize(source_path)
         
         with open(source_path, 'rb') as source_file:
-            data = source_file.read()
+            # Map the image for extraction: pages fault in on demand and nothing is copied.
+            # The length comes from the end offset, so block devices (st_size 0) map too
+            mm = map_file(source_file)
+            if mm is not None:
+                # Doubles kernel readahead; no DONTNEED afterwards since extraction re-reads these pages
+                fadvise(source_file, 'POSIX_FADV_SEQUENTIAL')
+                image = mm
+            else:
+                # Pipes can't be mapped and can only be read once, so hold them in memory;
+                # an empty file also lands here and yields no matches
+                image = source_file.read()
             
-            for signature, info in track(self.signatures.items(), description="Carving files..."):
-                positions = self._find_all_occurrences(data, signature)
+            data = memoryview(image)
+            try:
+                # Matching streams through a mapped file separately with read-ahead
+                if mm is not None:
+                    matches = self.scanner.scan_file(source_file)
+                else:
+                    matches = self.scanner.scan(image)
                 
-                for i, pos in enumerate(positions):
-                    file_data = self._extract_file_data(data, pos, signature, info['ext'])
-                    if file_data:
-                        # Create unique filename
-                        filename = f"carved_{info['ext']}_{pos:08x}_{i}.{info['ext']}"
-                        filepath = output_path / filename
-                        
-                        # Save file
-                        with open(filepath, 'wb') as f:
-                            f.write(file_data)
-                        
-                        # Calculate hashes
-                        file_hash = hashlib.sha256(file_data).hexdigest()
-                        
-                        recovered_files.append({
-                            'filename': filename,
-                            'type': info['type'],
-                            'extension': info['ext'],
-                            'size': len(file_data),
-                            'hash_sha256': file_hash,
-                            'original_position': pos,
-                            'description': info['description']
-                        })
+                # Slicing, writing and SHA-256 all release the GIL, so carved files are saved concurrently
+                with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+                    futures = [
+                        executor.submit(self._extract_and_save, image, data, i, pos, sig_id, output_path)
+                        for i, (pos, sig_id) in enumerate(matches)
+                    ]
+                    for future in track(futures, description="Carving files..."):
+                        file_info = future.result()
+                        if file_info:
+                            recovered_files.append(file_info)
+            finally:
+                data.release()
+                if mm is not None:
+                    mm.close()
         
         return {
             'recovered_files': recovered_files,
@@ -140,48 +182,131 @@ class AdvancedFileCarver:
             'output_directory': str(output_path)
         }
     
-    def _find_all_occurrences(self, data: bytes, pattern: bytes) -> List[int]:
-        """Find all occurrences of a pattern in data"""
-        positions = []
-        start = 0
-        while True:
-            pos = data.find(pattern, start)
-            if pos == -1:
-                break
-            positions.append(pos)
-            start = pos + 1
-        return positions
+    def _extract_and_save(self, image: mmap.mmap, data: memoryview, index: int, position: int, sig_id: int, output_path: Path) -> Optional[Dict]:
+        """Carve one match to disk and describe it, or return None if nothing was extracted"""
+        info = self.signature_info[sig_id]
+        
+        # Zero-copy slice of the mapping; released before the mapping is closed
+        with self._extract_file_data(image, data, position, info['ext']) as file_data:
+            if not file_data:
+                return None
+            
+            # Create unique filename
+            filename = f"carved_{info['ext']}_{position:08x}_{index}.{info['ext']}"
+            filepath = output_path / filename
+            
+            # Save and hash in one pass: each chunk is hashed and written while still in cache
+            sha256 = hashlib.sha256()
+            with open(filepath, 'wb') as f:
+                for offset in range(0, len(file_data), CARVE_CHUNK_SIZE):
+                    with file_data[offset:offset + CARVE_CHUNK_SIZE] as chunk:
+                        sha256.update(chunk)
+                        f.write(chunk)
+            file_hash = sha256.hexdigest()
+            
+            return {
+                'filename': filename,
+                'type': info['type'],
+                'extension': info['ext'],
+                'size': len(file_data),
+                'hash_sha256': file_hash,
+                'original_position': position,
+                'description': info['description']
+            }
     
-    def _extract_file_data(self, data: bytes, position: int, signature: bytes, extension: str) -> bytes:
-        """Extract file data based on signature and file type"""
-        # Simple extraction - in real implementation, you'd use proper file boundaries
-        if extension in ['jpg', 'png', 'gif']:
-            # For images, extract reasonable chunk
-            return data[position:position + 1024 * 1024]  # 1MB max for demo
+    def _extract_file_data(self, image: mmap.mmap, data: memoryview, position: int, extension: str) -> memoryview:
+        """Extract file data, ending at the format's trailer when one can be found"""
+        limit = min(len(image), position + TRAILER_SEARCH_LIMIT)
         
-        elif extension in ['pdf', 'docx']:
-            return data[position:position + 10 * 1024 * 1024]  # 10MB max
+        if extension == 'jpg':
+            end = self._find_jpeg_end(image, position, limit)
+        elif extension == 'png':
+            end = self._find_png_end(image, position, limit)
+        elif extension == 'pdf':
+            end = self._find_pdf_end(image, position, limit)
+        elif extension == 'zip':
+            end = self._find_zip_end(image, position, limit)
+        else:
+            end = -1
         
-        elif extension in ['zip', 'rar']:
-            return data[position:position + 5 * 1024 * 1024]  # 5MB max
+        if end == -1:
+            # No trailer found (or none exists for this format): fall back to a fixed-size carve
+            end = position + FIXED_CARVE_SIZES.get(extension, DEFAULT_CARVE_SIZE)
         
-        else:
-            return data[position:position + 512 * 1024]  # 512KB default
+        return data[position:end]
     
-    def display_capabilities(self):
-        """Display all supported file types"""
+    def _find_jpeg_end(self, image: mmap.mmap, position: int, limit: int) -> int:
+        """Find the end of a JPEG by skipping header segments to the scan data, then finding EOI"""
+        # Walking the segments skips APP1/EXIF, whose embedded thumbnail has its own EOI marker
+        offset = position + 2
+        while offset + 4 <= limit:
+            if image[offset] != 0xFF:
+                return -1
+            
+            marker = image[offset + 1]
+            if marker == 0xFF:
+                # Fill byte before a marker
+                offset += 1
+            elif marker == 0xDA:
+                # Entropy-coded data stuffs every 0xFF, so the first FF D9 ends the image
+                end = image.find(b'\xFF\xD9', offset, limit)
+                return -1 if end == -1 else end + 2
+            else:
+                (length,) = struct.unpack_from('>H', image, offset + 2)
+                offset += 2 + length
+        
+        return -1
+    
+    def _find_png_end(self, image: mmap.mmap, position: int, limit: int) -> int:
+        """Find the end of a PNG by walking its chunks to IEND"""
+        offset = position + 8
+        while offset + 12 <= limit:
+            length, chunk_type = struct.unpack_from('>I4s', image, offset)
+            # Length, type, data and CRC
+            offset += 12 + length
+            if chunk_type == b'IEND':
+                return offset if offset <= limit else -1
+        
+        return -1
+    
+    def _find_pdf_end(self, image: mmap.mmap, position: int, limit: int) -> int:
+        """Find the end of a PDF: its last %%EOF before the next PDF header"""
+        # Incremental saves append further %%EOF markers, so take the last one that still belongs to this file
+        next_header = image.find(b'%PDF', position + 4, limit)
+        if next_header != -1:
+            limit = next_header
+        
+        end = image.rfind(b'%%EOF', position, limit)
+        return -1 if end == -1 else end + 5
+    
+    def _find_zip_end(self, image: mmap.mmap, position: int, limit: int) -> int:
+        """Find the end of a ZIP: its end-of-central-directory record plus comment"""
+        eocd = image.find(b'\x50\x4B\x05\x06', position, limit)
+        if eocd == -1 or eocd + 22 > limit:
+            return -1
+        
+        (comment_length,) = struct.unpack_from('<H', image, eocd + 20)
+        return min(eocd + 22 + comment_length, limit)
+    
+    @cached_property
+    def capabilities_table(self) -> Table:
+        """Table of all supported file types, built on first use"""
         table = Table(title="Supported File Types", show_header=True)
         table.add_column("Extension", style="cyan")
         table.add_column("Type", style="green")
         table.add_column("Description", style="white")
         table.add_column("Signature", style="yellow")
         
-        for sig, info in self.signatures.items():
+        for info in self.signature_info:
             table.add_row(
                 info['ext'],
                 info['type'],
                 info['description'],
-                sig.hex().upper()
+                info['hex_upper']
             )
         
-        console.print(table)
+        return table
+    
+    def display_capabilities(self):
+        """Display all supported file types"""
+        console.print(self.capabilities_table)
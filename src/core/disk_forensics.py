@@ -3,8 +3,9 @@
 
 import os
 import psutil
+import shutil
+import stat
 import subprocess
-from pathlib import Path
 from typing import Dict, List
 from rich.console import Console
 from rich.table import Table
@@ -34,21 +35,20 @@ class DiskForensics:
     
     def _get_source_info(self, source_path: str) -> Dict:
         """Get detailed information about the source"""
-        path = Path(source_path)
-        
-        if not path.exists():
+        # One stat() call; the type checks below are derived from its mode bits
+        try:
+            stats = os.stat(source_path)
+        except (FileNotFoundError, NotADirectoryError):
             return {'error': 'Source path does not exist'}
         
-        stats = path.stat()
-        
         return {
-            'path': str(path.absolute()),
+            'path': os.path.abspath(source_path),
             'size_bytes': stats.st_size,
             'size_human': self._bytes_to_human(stats.st_size),
             'created': stats.st_ctime,
             'modified': stats.st_mtime,
-            'is_file': path.is_file(),
-            'is_block_device': path.is_block_device()
+            'is_file': stat.S_ISREG(stats.st_mode),
+            'is_block_device': stat.S_ISBLK(stats.st_mode)
         }
     
     def _analyze_file_system(self, source_path: str) -> Dict:
@@ -85,16 +85,9 @@ class DiskForensics:
     def _check_forensic_tools(self) -> List[str]:
         """Check availability of forensic tools"""
         tools = ['file', 'strings', 'hexdump', 'dd']
-        available = []
         
-        for tool in tools:
-            try:
-                subprocess.run([tool, '--version'], capture_output=True)
-                available.append(tool)
-            except:
-                pass
-                
-        return available
+        # PATH lookup only: running a tool to probe it can hang
+        return [tool for tool in tools if shutil.which(tool)]
     
     def _bytes_to_human(self, size_bytes: int) -> str:
         """Convert bytes to human readable format"""
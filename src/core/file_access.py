@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""Page-cache hints and memory mapping for scanned images and devices"""
+
+import mmap
+import os
+
+
+def fadvise(f, advice_name: str, offset: int = 0, length: int = 0):
+    """Apply a posix_fadvise hint where the platform and file type support it; a no-op otherwise"""
+    # No posix_fadvise on macOS or Windows, and pipes reject it with ESPIPE
+    advice = getattr(os, advice_name, None)
+    if advice is None or not f.seekable():
+        return
+    try:
+        os.posix_fadvise(f.fileno(), offset, length, advice)
+    except OSError:
+        pass
+
+
+def map_file(f):
+    """Map an open file read-only, or return None if it is empty or can't be mapped"""
+    # Block devices report st_size 0, so take the length from the end offset and pass it explicitly
+    try:
+        size = f.seek(0, os.SEEK_END)
+        f.seek(0)
+    except (OSError, ValueError):
+        return None
+    if not size:
+        return None
+
+    try:
+        return mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
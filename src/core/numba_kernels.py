@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Numba kernels for the signature scanner, imported only when that backend is selected"""
+
+import numba
+import numpy as np
+
+# Positions per parallel Numba work item
+NUMBA_TILE = 1024 * 1024
+
+# Positions between checks of whether the Numba presence scan can stop early
+NUMBA_PRESENCE_BLOCK = 64 * 1024
+
+
+@numba.njit(cache=True, boundscheck=False)
+def scan_range(data, sig_bytes, sig_starts, sig_lens, bucket_starts, bucket_ids,
+               start, stop, out_pos, out_ids, out_at, found):
+    """Match every signature at positions [start, stop); only count when out_pos is empty"""
+    n = data.shape[0]
+    # A non-empty found array is a filter: flagged signatures are skipped and new matches flagged
+    track = found.shape[0] > 0
+    count = 0
+    for i in range(start, stop):
+        # Most bytes start no signature: one load and one table lookup, then move on
+        first = data[i]
+        for k in range(bucket_starts[first], bucket_starts[first + 1]):
+            sig_id = bucket_ids[k]
+            length = sig_lens[sig_id]
+            if i + length > n or (track and found[sig_id]):
+                continue
+            base = sig_starts[sig_id]
+            j = 1
+            while j < length and data[i + j] == sig_bytes[base + j]:
+                j += 1
+            if j == length:
+                if track:
+                    found[sig_id] = True
+                if out_pos.shape[0]:
+                    out_pos[out_at + count] = i
+                    out_ids[out_at + count] = sig_id
+                count += 1
+    return count
+
+
+@numba.njit(parallel=True, cache=True, boundscheck=False)
+def scan(data, sig_bytes, sig_starts, sig_lens, bucket_starts, bucket_ids):
+    """Two parallel passes over tiles: count matches per tile, then fill at prefix offsets"""
+    n = data.shape[0]
+    n_tiles = (n + NUMBA_TILE - 1) // NUMBA_TILE
+    empty = np.empty(0, np.int64)
+    no_filter = np.empty(0, np.bool_)
+
+    counts = np.zeros(n_tiles + 1, np.int64)
+    for t in numba.prange(n_tiles):
+        stop = min((t + 1) * NUMBA_TILE, n)
+        counts[t + 1] = scan_range(
+            data, sig_bytes, sig_starts, sig_lens, bucket_starts, bucket_ids,
+            t * NUMBA_TILE, stop, empty, empty, 0, no_filter
+        )
+    offsets = np.cumsum(counts)
+
+    out_pos = np.empty(offsets[n_tiles], np.int64)
+    out_ids = np.empty(offsets[n_tiles], np.int64)
+    for t in numba.prange(n_tiles):
+        stop = min((t + 1) * NUMBA_TILE, n)
+        scan_range(
+            data, sig_bytes, sig_starts, sig_lens, bucket_starts, bucket_ids,
+            t * NUMBA_TILE, stop, out_pos, out_ids, offsets[t], no_filter
+        )
+    return out_pos, out_ids
+
+
+@numba.njit(parallel=True, cache=True, boundscheck=False)
+def presence(data, sig_bytes, sig_starts, sig_lens, bucket_starts, bucket_ids):
+    """Flag which signatures occur at all, skipping found ones and stopping once all are found"""
+    n = data.shape[0]
+    n_sigs = sig_lens.shape[0]
+    n_tiles = (n + NUMBA_TILE - 1) // NUMBA_TILE
+    empty = np.empty(0, np.int64)
+
+    # Shared by every tile: flags only ever go from False to True, so unsynchronized stores are safe
+    found = np.zeros(n_sigs, np.bool_)
+    for t in numba.prange(n_tiles):
+        stop = min((t + 1) * NUMBA_TILE, n)
+        for block in range(t * NUMBA_TILE, stop, NUMBA_PRESENCE_BLOCK):
+            # Leave the tile as soon as every signature has been seen by any tile
+            if found.all():
+                break
+            scan_range(
+                data, sig_bytes, sig_starts, sig_lens, bucket_starts, bucket_ids,
+                block, min(block + NUMBA_PRESENCE_BLOCK, stop), empty, empty, 0, found
+            )
+    return found
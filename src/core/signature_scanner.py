@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""Single-pass multi-signature scanning"""
+
+import mmap
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from itertools import chain
+from typing import AbstractSet, BinaryIO, Iterator, List, Optional, Sequence, Set, Tuple
+
+from core.file_access import fadvise
+
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Bytes per cache-blocked tile in the NumPy backend, sized to stay resident in L2
+NUMPY_TILE = 256 * 1024
+
+# Bytes per Hyperscan block-mode call: its length is 32-bit, and the binding truncates longer buffers silently
+HYPERSCAN_WINDOW = 2 * 1024 * 1024 * 1024
+
+# Bytes decoded to text per Aho-Corasick pass
+AUTOMATON_WINDOW = 16 * 1024 * 1024
+
+# Smallest file worth splitting across worker processes; below this, pool start-up costs more than it saves
+PARALLEL_MIN_BYTES = 64 * 1024 * 1024
+
+# Backends that gain nothing from worker processes: the Numba kernel already spreads over cores with prange,
+# and single-threaded Hyperscan matches at close to memory bandwidth, so extra cores would only wait on RAM
+NATIVE_BACKENDS = ('hyperscan', 'numba')
+
+# Fill bytes of erased flash and zeroed sectors; long runs of them dominate real images
+FILL_BYTES = (0x00, 0xFF)
+
+@lru_cache(maxsize=None)
+def _worker_scanner(signatures: Tuple[bytes, ...]) -> 'SignatureScanner':
+    """Build a scanner once per worker process"""
+    return SignatureScanner(signatures)
+
+
+def _present_in_range(signatures: Tuple[bytes, ...], path: str, start: int, stop: int) -> Set[int]:
+    """Worker: map bytes [start, stop) of the file and report which signatures occur there"""
+    # Map offsets must be granularity-aligned; the few extra leading bytes only repeat a neighbour's work
+    offset = start - start % mmap.ALLOCATIONGRANULARITY
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), stop - offset, access=mmap.ACCESS_READ, offset=offset) as mm:
+        return _worker_scanner(signatures).present(mm)
+
+
+class SignatureScanner:
+    """Locate every occurrence of a fixed set of byte signatures in one pass"""
+
+    def __init__(self, signatures: Sequence[bytes]):
+        self.signatures = list(signatures)
+        self.max_length = max(len(sig) for sig in self.signatures)
+        self.backend, self._matcher = self._select_backend()
+        self._scan = getattr(self, f'_scan_{self.backend}')
+        self._present = getattr(self, f'_present_{self.backend}')
+
+    def _select_backend(self):
+        """Pick the fastest available matcher; the stdlib regex matcher is always available"""
+        builders = (
+            ('hyperscan', self._build_hyperscan_db),
+            ('numba', self._build_numba_tables),
+            ('numpy', self._build_numpy_groups),
+            ('automaton', self._build_automaton),
+            ('regex', self._build_regex),
+        )
+        for name, build in builders:
+            matcher = build()
+            if matcher is not None:
+                return name, matcher
+
+    def _build_hyperscan_db(self):
+        """Compile all signatures into a Hyperscan block-mode database"""
+        if hyperscan is None:
+            return None
+
+        # Hex-escape every byte: expressions are C strings, so a raw NUL would truncate them
+        expressions = [b''.join(b'\\x%02x' % byte for byte in sig) for sig in self.signatures]
+        try:
+            db = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+            db.compile(
+                expressions=expressions,
+                ids=list(range(len(expressions))),
+                elements=len(expressions),
+                flags=[0] * len(expressions)
+            )
+        except hyperscan.error:
+            # e.g. a CPU without the SSSE3 baseline Hyperscan requires
+            return None
+        return db
+
+    def _build_automaton(self):
+        """Compile all signatures into a single Aho-Corasick automaton"""
+        if ahocorasick is None:
+            return None
+
+        automaton = ahocorasick.Automaton()
+        for sig_id, signature in enumerate(self.signatures):
+            # pyahocorasick wheels are built for str keys; latin-1 maps every byte to one code point
+            automaton.add_word(signature.decode('latin-1'), (sig_id, len(signature)))
+        automaton.make_automaton()
+        return automaton
+
+    def _build_numba_tables(self):
+        """Flatten the signatures into arrays for the Numba kernels"""
+        # Imported only here: loading Numba alone takes longer than a small scan, so skip it when Hyperscan is built
+        try:
+            from core import numba_kernels
+        except ImportError:
+            return None
+
+        lengths = [len(sig) for sig in self.signatures]
+        sig_bytes = np.frombuffer(b''.join(self.signatures), dtype=np.uint8)
+        sig_starts = np.cumsum([0] + lengths[:-1]).astype(np.int64)
+
+        # 256 first-byte buckets in CSR form: bucket b holds bucket_ids[bucket_starts[b]:bucket_starts[b + 1]]
+        by_first_byte = sorted(range(len(self.signatures)), key=lambda sig_id: self.signatures[sig_id][0])
+        bucket_ids = np.array(by_first_byte, dtype=np.int64)
+        bucket_starts = np.zeros(257, dtype=np.int64)
+        for sig in self.signatures:
+            bucket_starts[sig[0] + 1] += 1
+        bucket_starts = np.cumsum(bucket_starts)
+
+        return numba_kernels, (sig_bytes, sig_starts, np.array(lengths, dtype=np.int64), bucket_starts, bucket_ids)
+
+    def _build_numpy_groups(self):
+        """Group signatures by first byte for the vectorized NumPy filter"""
+        if np is None:
+            return None
+
+        groups = {}
+        for sig_id, signature in enumerate(self.signatures):
+            groups.setdefault(signature[0], []).append((sig_id, signature))
+        return list(groups.items())
+
+    def _build_regex(self):
+        """Compile the signatures into one stdlib re alternation plus memchr anchors for the rest"""
+        # A signature opening with a fill byte makes the re engine try a match at every byte of a fill run,
+        # so those are instead located by memchr on their rarest byte and verified in place
+        anchored = {}
+        regex_ids = []
+        for sig_id, signature in enumerate(self.signatures):
+            if signature[0] not in FILL_BYTES:
+                regex_ids.append(sig_id)
+                continue
+            offset = max(
+                range(len(signature)),
+                key=lambda i: (signature[i] not in FILL_BYTES, not 0x20 <= signature[i] < 0x7F)
+            )
+            anchored.setdefault(bytes([signature[offset]]), []).append((sig_id, signature, offset))
+
+        if not regex_ids:
+            return None, {}, list(anchored.items())
+
+        # Longest first, so where one signature prefixes another the longer one is what matches
+        ordered = sorted({self.signatures[sig_id] for sig_id in regex_ids}, key=len, reverse=True)
+        pattern = re.compile(b'|'.join(re.escape(sig) for sig in ordered))
+
+        # Every signature that is a prefix of the matched one (itself included) also matches there
+        prefix_ids = {
+            sig: [sig_id for sig_id in regex_ids if sig.startswith(self.signatures[sig_id])]
+            for sig in ordered
+        }
+        return pattern, prefix_ids, list(anchored.items())
+
+    def scan(self, data) -> List[Tuple[int, int]]:
+        """Return (position, signature index) for every match, ordered by position"""
+        matches = self._scan(data)
+        matches.sort()
+        return matches
+
+    def present(self, data) -> Set[int]:
+        """Return the index of every signature that occurs at least once"""
+        # Each backend stops looking for a signature once it is found, and stops scanning once all are
+        if not len(data):
+            return set()
+        return self._present(data)
+
+    def should_parallelize(self, size: int) -> bool:
+        """Whether present_parallel is worth its process start-up for a file of this size"""
+        return self.backend not in NATIVE_BACKENDS and size >= PARALLEL_MIN_BYTES and (os.cpu_count() or 1) > 1
+
+    def present_parallel(self, path: str, size: int, workers: Optional[int] = None) -> Set[int]:
+        """Like present, but split a regular file into ranges scanned by separate processes"""
+        workers = workers or os.cpu_count() or 1
+        span = -(-size // workers)
+        overlap = self.max_length - 1
+        # Each worker maps its own range; the pages come from the shared page cache, not a copy.
+        # Ranges run on by max_length - 1 so a signature straddling a split is still seen
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(_present_in_range, tuple(self.signatures), path, start, min(start + span + overlap, size))
+                for start in range(0, size, span)
+            ]
+            return set().union(*(future.result() for future in futures))
+
+    def scan_file(self, source_file: BinaryIO, chunk_size: int = 16 * 1024 * 1024) -> List[Tuple[int, int]]:
+        """Scan an open binary file chunk by chunk, reading ahead while the current chunk is scanned"""
+        # Carry the last max_length - 1 bytes forward so matches across a chunk boundary are found
+        overlap = self.max_length - 1
+        matches = []
+        tail = b''
+        window_offset = 0
+        read_offset = 0
+
+        # File reads release the GIL, so the next chunk loads while this thread scans
+        with ThreadPoolExecutor(max_workers=1) as reader:
+            pending = reader.submit(source_file.read, chunk_size)
+            while True:
+                chunk = pending.result()
+                if not chunk:
+                    break
+                pending = reader.submit(source_file.read, chunk_size)
+                read_offset += chunk_size
+
+                # Ask the kernel to start on the chunks beyond the one being read now
+                fadvise(source_file, 'POSIX_FADV_WILLNEED', read_offset + chunk_size, 4 * chunk_size)
+
+                window = tail + chunk
+                for pos, sig_id in self.scan(window):
+                    # Matches lying wholly inside the carried tail were reported with the previous chunk
+                    if pos + len(self.signatures[sig_id]) > len(tail):
+                        matches.append((window_offset + pos, sig_id))
+
+                tail = window[-overlap:] if overlap else b''
+                window_offset += len(window) - len(tail)
+
+        matches.sort()
+        return matches
+
+    def _scan_hyperscan(self, data) -> List[Tuple[int, int]]:
+        """Match with the compiled Hyperscan database"""
+        matches = []
+        lengths = [len(sig) for sig in self.signatures]
+
+        def on_match(sig_id, start, end, flags, window_start):
+            # Signatures are fixed-length, so the start offset follows from the end
+            start = end - lengths[sig_id]
+            # Matches starting in the overlap belong to the next window
+            if start < HYPERSCAN_WINDOW:
+                matches.append((window_start + start, sig_id))
+
+        self._hyperscan_windows(data, on_match)
+        return matches
+
+    def _scan_automaton(self, data) -> List[Tuple[int, int]]:
+        """Match with the Aho-Corasick automaton, one bounded window at a time"""
+        return list(self._automaton_hits(data))
+
+    def _scan_numba(self, data) -> List[Tuple[int, int]]:
+        """Match with the parallel Numba kernel"""
+        if not len(data):
+            return []
+        kernels, tables = self._matcher
+        positions, sig_ids = kernels.scan(np.frombuffer(data, dtype=np.uint8), *tables)
+        return list(zip(positions.tolist(), sig_ids.tolist()))
+
+    def _scan_numpy(self, data) -> List[Tuple[int, int]]:
+        """Match with vectorized NumPy byte compares: filter on the first byte, then verify the rest"""
+        matches = []
+        for tile_start, sig_id, hits in self._numpy_hits(data, frozenset()):
+            matches.extend((tile_start + pos, sig_id) for pos in hits.tolist())
+        return matches
+
+    def _scan_regex(self, data) -> List[Tuple[int, int]]:
+        """Match with the combined regex and the memchr anchors, searching in C between hits"""
+        matches = list(self._regex_hits(data, frozenset()))
+        matches.extend(self._anchor_hits(data, frozenset()))
+        return matches
+
+    def _present_hyperscan(self, data) -> Set[int]:
+        """Presence with the Hyperscan database, terminating the scan once every signature is seen"""
+        found = set()
+
+        def on_match(sig_id, start, end, flags, context):
+            found.add(sig_id)
+            # A true return tells Hyperscan to stop
+            return len(found) == len(self.signatures)
+
+        try:
+            self._hyperscan_windows(data, on_match)
+        except hyperscan.ScanTerminated:
+            pass
+        return found
+
+    def _present_numba(self, data) -> Set[int]:
+        """Presence with the parallel Numba kernel"""
+        kernels, tables = self._matcher
+        found = kernels.presence(np.frombuffer(data, dtype=np.uint8), *tables)
+        return set(np.flatnonzero(found).tolist())
+
+    def _present_numpy(self, data) -> Set[int]:
+        """Presence with the NumPy first-byte filter, skipping signatures in later tiles once found"""
+        found = set()
+        return self._collect_present((sig_id for _, sig_id, _ in self._numpy_hits(data, found)), found)
+
+    def _present_automaton(self, data) -> Set[int]:
+        """Presence with the Aho-Corasick automaton, leaving off once every signature is seen"""
+        found = set()
+        return self._collect_present((sig_id for _, sig_id in self._automaton_hits(data)), found)
+
+    def _present_regex(self, data) -> Set[int]:
+        """Presence with the regex and memchr anchors, narrowing both to the signatures not yet found"""
+        found = set()
+        hits = chain(self._regex_hits(data, found), self._anchor_hits(data, found))
+        return self._collect_present((sig_id for _, sig_id in hits), found)
+
+    def _collect_present(self, sig_ids: Iterator[int], found: Set[int]) -> Set[int]:
+        """Add lazily produced signature indices to found, stopping as soon as every signature is in it"""
+        # The hit generators consult found as it grows, so they stop looking for what is already there
+        for sig_id in sig_ids:
+            found.add(sig_id)
+            if len(found) == len(self.signatures):
+                break
+        return found
+
+    def _hyperscan_windows(self, data, on_match):
+        """Run the Hyperscan database over bounded windows, passing each window's offset as the match context"""
+        # Windows run on by max_length - 1 so a signature straddling a split is still seen.
+        # Slice a memoryview: slicing an mmap directly would copy each window
+        overlap = self.max_length - 1
+        with memoryview(data) as view:
+            for window_start in range(0, len(view), HYPERSCAN_WINDOW):
+                window = view[window_start:window_start + HYPERSCAN_WINDOW + overlap]
+                self._matcher.scan(window, match_event_handler=on_match, context=window_start)
+
+    def _automaton_hits(self, data) -> Iterator[Tuple[int, int]]:
+        """Yield (position, signature index) from the Aho-Corasick automaton, one bounded window at a time"""
+        # The automaton needs a str copy of its input; windowing keeps that copy small for mapped images
+        overlap = self.max_length - 1
+        for window_start in range(0, len(data), AUTOMATON_WINDOW):
+            text = str(data[window_start:window_start + AUTOMATON_WINDOW + overlap], 'latin-1')
+            for end, (sig_id, length) in self._matcher.iter(text):
+                start = end - length + 1
+                # Matches starting in the overlap belong to the next window
+                if start < AUTOMATON_WINDOW:
+                    yield window_start + start, sig_id
+
+    def _numpy_hits(self, data, skip: AbstractSet[int]) -> Iterator[Tuple[int, int, 'np.ndarray']]:
+        """Yield (tile start, signature index, offsets in the tile) per tile, passing over signatures in skip"""
+        arr = np.frombuffer(data, dtype=np.uint8)
+        overlap = self.max_length - 1
+
+        # Cache blocking: each first-byte pass re-reads the tile from L2 rather than streaming from DRAM
+        for tile_start in range(0, arr.shape[0], NUMPY_TILE):
+            tile = arr[tile_start:tile_start + NUMPY_TILE + overlap]
+            heads = tile[:NUMPY_TILE]
+            n = tile.shape[0]
+            for first_byte, group in self._matcher:
+                if skip and all(sig_id in skip for sig_id, _ in group):
+                    continue
+                candidates = np.flatnonzero(heads == first_byte)
+                if not candidates.size:
+                    continue
+                for sig_id, signature in group:
+                    if sig_id in skip:
+                        continue
+                    hits = candidates[candidates <= n - len(signature)]
+                    # Narrow the candidates one signature byte at a time, all in C
+                    for offset in range(1, len(signature)):
+                        hits = hits[tile[hits + offset] == signature[offset]]
+                    if hits.size:
+                        yield tile_start, sig_id, hits
+
+    def _regex_hits(self, data, skip: AbstractSet[int]) -> Iterator[Tuple[int, int]]:
+        """Yield (position, signature index) from the combined regex, recompiling it without skip as that grows"""
+        pattern, prefix_ids, _ = self._matcher
+        if pattern is None:
+            return
+
+        remaining = list(prefix_ids)
+        skipped = len(skip)
+        match = pattern.search(data)
+        while match:
+            pos = match.start()
+            for sig_id in prefix_ids[match.group()]:
+                yield pos, sig_id
+
+            if len(skip) != skipped:
+                # Drop the signatures now skipped, so they stop producing hits
+                skipped = len(skip)
+                remaining = [sig for sig in remaining if not skip.issuperset(prefix_ids[sig])]
+                if not remaining:
+                    return
+                pattern = re.compile(b'|'.join(re.escape(sig) for sig in remaining))
+
+            # Resume one byte on rather than after the match, so overlapping signatures are found
+            match = pattern.search(data, pos + 1)
+
+    def _anchor_hits(self, data, skip: AbstractSet[int]) -> Iterator[Tuple[int, int]]:
+        """Yield (position, signature index) for the memchr-anchored signatures, dropping those in skip"""
+        _, _, anchored = self._matcher
+        end = len(data)
+        for anchor, group in anchored:
+            group = [entry for entry in group if entry[0] not in skip]
+            skipped = len(skip)
+            hit = data.find(anchor) if group else -1
+            while hit != -1:
+                for sig_id, signature, offset in group:
+                    pos = hit - offset
+                    if pos >= 0 and pos + len(signature) <= end and data[pos:pos + len(signature)] == signature:
+                        yield pos, sig_id
+
+                if len(skip) != skipped:
+                    skipped = len(skip)
+                    group = [entry for entry in group if entry[0] not in skip]
+                    if not group:
+                        break
+                hit = data.find(anchor, hit + 1)
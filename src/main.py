@@ -5,9 +5,85 @@ CyberRecover Pro - Advanced Forensic Data Recovery Tool
 
 import sys
 import os
+import mmap
 import argparse
+import hashlib
+import importlib.util
+import threading
+import time
+from functools import lru_cache
 from pathlib import Path
 
+from core.file_access import fadvise, map_file
+
+# Comprehensive file signatures for quick scans
+QUICK_SCAN_SIGNATURES = {
+    b'\xFF\xD8\xFF\xE0': 'JPEG Image',
+    b'\xFF\xD8\xFF\xE1': 'JPEG Image (EXIF)',
+    b'\x89\x50\x4E\x47': 'PNG Image',
+    b'\x47\x49\x46\x38': 'GIF Image',
+    b'\x42\x4D': 'BMP Image',
+    b'\x25\x50\x44\x46': 'PDF Document',
+    b'\x50\x4B\x03\x04': 'ZIP Archive',
+    b'\x52\x61\x72\x21': 'RAR Archive',
+    b'\x37\x7A\xBC\xAF': '7-Zip Archive',
+    b'\x49\x44\x33': 'MP3 Audio',
+    b'\xFF\xFB': 'MP3 Audio (no ID3)',
+    b'\x52\x49\x46\x46': 'AVI Video',
+    b'\x1A\x45\xDF\xA3': 'MKV Video',
+    b'\x7F\x45\x4C\x46': 'ELF Executable',
+    b'\x4D\x5A': 'Windows EXE',
+    b'\xCA\xFE\xBA\xBE': 'Java Class',
+}
+
+# File types listed by show_file_carving_capabilities, with the hex shown for each
+CARVING_CAPABILITIES = tuple((file_type, signature.hex(' ').upper()) for file_type, signature in (
+    ('JPEG Images', b'\xFF\xD8\xFF\xE0'),
+    ('PNG Images', b'\x89\x50\x4E\x47'),
+    ('PDF Documents', b'\x25\x50\x44\x46'),
+    ('ZIP Archives', b'\x50\x4B\x03\x04'),
+    ('RAR Archives', b'\x52\x61\x72\x21'),
+    ('MP3 Audio', b'\x49\x44\x33'),
+    ('Windows EXE', b'\x4D\x5A'),
+    ('ELF Executables', b'\x7F\x45\x4C\x46'),
+    ('GIF Images', b'\x47\x49\x46\x38'),
+    ('BMP Images', b'\x42\x4D'),
+    ('7-Zip Archives', b'\x37\x7A\xBC\xAF'),
+    ('Java Classes', b'\xCA\xFE\xBA\xBE'),
+))
+
+# Test image sections: file signature, filler pattern, pattern repeats
+TEST_IMAGE_SECTIONS = (
+    (b'\xFF\xD8\xFF\xE0', b'JPEG_CONTENT', 100),  # JPEG
+    (b'\x89\x50\x4E\x47', b'PNG_CONTENT_', 100),  # PNG
+    (b'\x25\x50\x44\x46', b'PDF_CONTENT_', 100),  # PDF
+    (b'\x50\x4B\x03\x04', b'ZIP_CONTENT_', 100),  # ZIP
+    (b'\x52\x61\x72\x21', b'RAR_CONTENT_', 50),   # RAR
+    (b'\x49\x44\x33', b'MP3_CONTENT_', 50),        # MP3
+)
+
+# Sparse test image just past 4 GiB, with a signature on each side of the 4 GiB mark: offset, signature
+LARGE_TEST_IMAGE_SIZE = 4 * 1024 ** 3 + 4096
+LARGE_TEST_IMAGE_SIGNATURES = (
+    (100, b'\x7F\x45\x4C\x46'),                # ELF
+    (4 * 1024 ** 3 + 100, b'\xCA\xFE\xBA\xBE'),  # Java class
+)
+
+# Seconds to wait for the usage of all mounted partitions
+PARTITION_USAGE_TIMEOUT = 5
+
+@lru_cache(maxsize=1)
+def _get_quick_scanner():
+    """Compile QUICK_SCAN_SIGNATURES into a single-pass scanner, once per process"""
+    # Imported here so commands that never scan don't load the optional accelerators
+    from core.signature_scanner import SignatureScanner
+    return SignatureScanner(list(QUICK_SCAN_SIGNATURES))
+
+@lru_cache(maxsize=None)
+def _module_available(name: str) -> bool:
+    """Check whether a module is importable without executing it"""
+    return importlib.util.find_spec(name) is not None
+
 def display_banner():
     """Display the CyberRecover Pro banner"""
     banner = r"""
@@ -25,7 +101,7 @@ def display_banner():
     ║                                                              ║
     ╚══════════════════════════════════════════════════════════════╝
     """
-    print("\033[92m" + banner + "\033[0m")  # Green color
+    sys.stdout.write("\033[92m" + banner + "\033[0m\n")  # Green color
 
 def main():
     display_banner()
@@ -50,7 +126,8 @@ def main():
     subparsers.add_parser('system-info', help='Display system information')
     
     # Create test
-    subparsers.add_parser('create-test', help='Create test forensic image')
+    test_parser = subparsers.add_parser('create-test', help='Create test forensic image')
+    test_parser.add_argument('--large', action='store_true', help='Create a sparse image larger than 4 GiB instead')
     
     args = parser.parse_args()
     
@@ -68,7 +145,10 @@ def main():
         elif args.command == 'system-info':
             check_environment()
         elif args.command == 'create-test':
-            create_test_image()
+            if args.large:
+                create_large_test_image()
+            else:
+                create_test_image()
             
     except KeyboardInterrupt:
         print("\n❌ Operation cancelled by user")
@@ -83,28 +163,24 @@ def check_environment():
     print("")
     
     # Test imports
-    try:
-        import rich
+    if _module_available('rich'):
         print("✅ rich - Terminal formatting")
-    except ImportError:
+    else:
         print("❌ rich - Install with: pip install rich")
     
-    try:
-        import questionary
+    if _module_available('questionary'):
         print("✅ questionary - Interactive prompts")
-    except ImportError:
+    else:
         print("❌ questionary - Install with: pip install questionary")
     
-    try:
-        import psutil
+    if _module_available('psutil'):
         print("✅ psutil - System information")
-    except ImportError:
+    else:
         print("❌ psutil - Install with: pip install psutil")
     
-    try:
-        import yaml
+    if _module_available('yaml'):
         print("✅ pyyaml - YAML support")
-    except ImportError:
+    else:
         print("❌ pyyaml - Install with: pip install pyyaml")
     
     print("")
@@ -113,24 +189,80 @@ def check_environment():
 def create_test_image():
     print("🧪 Creating test forensic image...")
     
-    # Create test data with various file signatures
-    test_data = (
-        b'\xFF\xD8\xFF\xE0' + b'JPEG_CONTENT' * 100 +  # JPEG
-        b'\x89\x50\x4E\x47' + b'PNG_CONTENT_' * 100 +  # PNG
-        b'\x25\x50\x44\x46' + b'PDF_CONTENT_' * 100 +  # PDF
-        b'\x50\x4B\x03\x04' + b'ZIP_CONTENT_' * 100 +  # ZIP
-        b'\x52\x61\x72\x21' + b'RAR_CONTENT_' * 50 +   # RAR
-        b'\x49\x44\x33' + b'MP3_CONTENT_' * 50         # MP3
-    )
+    # Written section by section through a 1MB buffer instead of concatenating the whole image first
+    file_size = 0
+    with open('test_disk.img', 'wb', buffering=1024 * 1024) as f:
+        for signature, pattern, repeats in TEST_IMAGE_SECTIONS:
+            file_size += f.write(signature)
+            file_size += f.write(pattern * repeats)
     
-    with open('test_disk.img', 'wb') as f:
-        f.write(test_data)
-    
-    file_size = len(test_data)
     print(f"✅ Created: test_disk.img")
     print(f"📊 Size: {file_size} bytes ({file_size/1024/1024:.2f} MB)")
     print("🔍 Scan it with: python3 src/main.py quick-scan test_disk.img")
 
+def create_large_test_image():
+    print("🧪 Creating large sparse test image...")
+    
+    # Scanners that cut a buffer to 32 bits only see the first signature; both must be reported
+    with open('test_disk_large.img', 'wb') as f:
+        # Holes read back as zero and take no disk space
+        f.truncate(LARGE_TEST_IMAGE_SIZE)
+        for offset, signature in LARGE_TEST_IMAGE_SIGNATURES:
+            f.seek(offset)
+            f.write(signature)
+    
+    print(f"✅ Created: test_disk_large.img")
+    print(f"📊 Size: {LARGE_TEST_IMAGE_SIZE} bytes ({LARGE_TEST_IMAGE_SIZE/1024/1024/1024:.2f} GB, sparse)")
+    print("🔍 Scan it with: python3 src/main.py quick-scan test_disk_large.img")
+    print("   It should report both ELF Executable and Java Class")
+
+def _map_file(f):
+    """Map an open file read-only for a front-to-back scan, or return None if it can't be mapped"""
+    mm = map_file(f)
+    if mm is not None and hasattr(mmap, 'MADV_SEQUENTIAL'):
+        mm.madvise(mmap.MADV_SEQUENTIAL)
+    return mm
+
+def _file_type_names(hit_ids) -> list:
+    """Names of the quick-scan signatures with the given indices"""
+    names = list(QUICK_SCAN_SIGNATURES.values())
+    return [names[sig_id] for sig_id in sorted(hit_ids)]
+
+def _scan_buffer(mm, file_path: str) -> list:
+    """Names of the file types whose signatures occur in a mapped file"""
+    scanner = _get_quick_scanner()
+    if scanner.should_parallelize(len(mm)):
+        return _file_type_names(scanner.present_parallel(file_path, len(mm)))
+    return _file_type_names(scanner.present(mm))
+
+def _scan_stream(f) -> list:
+    """Names of the file types whose signatures occur in an unmappable file such as a pipe"""
+    # Streams in overlapping chunks, which keeps memory bounded whatever the input size
+    return _file_type_names({sig_id for _, sig_id in _get_quick_scanner().scan_file(f)})
+
+def _hash_stream(f) -> str:
+    """SHA-256 of a seekable file that couldn't be mapped, read from the start in 1MB blocks"""
+    # hashlib.file_digest does the same, but only from Python 3.11
+    f.seek(0)
+    digest = hashlib.sha256()
+    for block in iter(lambda: f.read(1024 * 1024), b''):
+        digest.update(block)
+    return digest.hexdigest()
+
+def _print_file_types(found: list):
+    """Print the file types found by a scan"""
+    if found:
+        print(f"✅ Found {len(found)} file types:")
+        for file_type in found:
+            print(f"   • {file_type}")
+        
+        # Show some statistics
+        unique_types = len({f.split()[0] for f in found})  # Count unique types
+        print(f"\n📈 Summary: {unique_types} unique file categories detected")
+    else:
+        print("❌ No known file signatures found")
+        print("💡 Try a different file or check if the file is corrupted")
+
 def perform_quick_scan(file_path):
     print(f"🔍 Scanning: {file_path}")
     
@@ -138,52 +270,29 @@ def perform_quick_scan(file_path):
         print(f"❌ File not found: {file_path}")
         return
     
-    # Comprehensive file signatures
-    signatures = {
-        b'\xFF\xD8\xFF\xE0': 'JPEG Image',
-        b'\xFF\xD8\xFF\xE1': 'JPEG Image (EXIF)',
-        b'\x89\x50\x4E\x47': 'PNG Image',
-        b'\x47\x49\x46\x38': 'GIF Image',
-        b'\x42\x4D': 'BMP Image',
-        b'\x25\x50\x44\x46': 'PDF Document',
-        b'\x50\x4B\x03\x04': 'ZIP Archive',
-        b'\x52\x61\x72\x21': 'RAR Archive',
-        b'\x37\x7A\xBC\xAF': '7-Zip Archive',
-        b'\x49\x44\x33': 'MP3 Audio',
-        b'\xFF\xFB': 'MP3 Audio (no ID3)',
-        b'\x52\x49\x46\x46': 'AVI Video',
-        b'\x1A\x45\xDF\xA3': 'MKV Video',
-        b'\x7F\x45\x4C\x46': 'ELF Executable',
-        b'\x4D\x5A': 'Windows EXE',
-        b'\xCA\xFE\xBA\xBE': 'Java Class',
-    }
-    
     try:
         file_size = os.path.getsize(file_path)
         print(f"📊 File size: {file_size} bytes")
         
-        # Read reasonable amount of data based on file size
-        read_size = min(file_size, 10 * 1024 * 1024)  # Max 10MB for scan
-        
+        # One pass over the whole file for all signatures, instead of one `in` test per signature
         with open(file_path, 'rb') as f:
-            data = f.read(read_size)
-        
-        found = []
-        for sig, name in signatures.items():
-            if sig in data:
-                found.append(name)
-        
-        if found:
-            print(f"✅ Found {len(found)} file types:")
-            for file_type in found:
-                print(f"   • {file_type}")
+            fadvise(f, 'POSIX_FADV_SEQUENTIAL')
             
-            # Show some statistics
-            unique_types = len(set([f.split()[0] for f in found]))  # Count unique types
-            print(f"\n📈 Summary: {unique_types} unique file categories detected")
-        else:
-            print("❌ No known file signatures found")
-            print("💡 Try a different file or check if the file is corrupted")
+            # Map instead of read: the scan works on the page cache directly, so there is
+            # no copy to bound and the old 10MB cap is gone
+            mm = _map_file(f)
+            if mm is None:
+                found = _scan_stream(f)
+            else:
+                try:
+                    found = _scan_buffer(mm, file_path)
+                finally:
+                    mm.close()
+            
+            # A quick scan reads the image once; drop its pages rather than crowd out the rest of the cache
+            fadvise(f, 'POSIX_FADV_DONTNEED')
+        
+        _print_file_types(found)
             
     except Exception as e:
         print(f"❌ Error scanning file: {e}")
@@ -199,8 +308,40 @@ def perform_deep_scan(file_path):
     print("   • Recovery potential assessment")
     print("")
     
-    # For now, use quick scan as the base
-    perform_quick_scan(file_path)
+    if not os.path.exists(file_path):
+        print(f"❌ File not found: {file_path}")
+        return
+    
+    try:
+        file_size = os.path.getsize(file_path)
+        print(f"📊 File size: {file_size} bytes")
+        
+        # Open and map once: the signature scan and the hash share the same pages
+        with open(file_path, 'rb') as f:
+            fadvise(f, 'POSIX_FADV_SEQUENTIAL')
+            
+            mm = _map_file(f)
+            if mm is None:
+                found = _scan_stream(f)
+                # A pipe can only be read once, so nothing is left to hash after the scan
+                digest = _hash_stream(f) if f.seekable() else None
+            else:
+                try:
+                    found = _scan_buffer(mm, file_path)
+                    # OpenSSL hashes the mapping directly (SHA-NI where the CPU has it), with no re-read
+                    digest = hashlib.sha256(mm).hexdigest()
+                finally:
+                    mm.close()
+        
+        _print_file_types(found)
+        print("")
+        if digest:
+            print(f"🔐 SHA-256: {digest}")
+        else:
+            print("🔐 SHA-256: unavailable for non-seekable input")
+            
+    except Exception as e:
+        print(f"❌ Error scanning file: {e}")
     
     print("")
     print("📋 Deep Scan Features:")
@@ -216,8 +357,10 @@ def start_interactive_mode():
         
         console = Console()
         
-        console.print("[bold green]🔍 CyberRecover Pro - Interactive Mode[/bold green]")
-        console.print("[yellow]Advanced Forensic Data Recovery Tool[/yellow]")
+        console.print(
+            "[bold green]🔍 CyberRecover Pro - Interactive Mode[/bold green]\n"
+            "[yellow]Advanced Forensic Data Recovery Tool[/yellow]"
+        )
         
         while True:
             choice = questionary.select(
@@ -259,41 +402,55 @@ def start_interactive_mode():
 
 def show_file_carving_capabilities():
     """Show all file types that can be recovered"""
-    signatures = {
-        'JPEG Images': 'FF D8 FF E0',
-        'PNG Images': '89 50 4E 47', 
-        'PDF Documents': '25 50 44 46',
-        'ZIP Archives': '50 4B 03 04',
-        'RAR Archives': '52 61 72 21',
-        'MP3 Audio': '49 44 33',
-        'Windows EXE': '4D 5A',
-        'ELF Executables': '7F 45 4C 46',
-        'GIF Images': '47 49 46 38',
-        'BMP Images': '42 4D',
-        '7-Zip Archives': '37 7A BC AF',
-        'Java Classes': 'CA FE BA BE',
-    }
-    
-    print("🛠️ File Carving Capabilities")
-    print("=" * 40)
-    for file_type, signature in signatures.items():
-        print(f"    • {file_type:20} - {signature}")
+    lines = ["🛠️ File Carving Capabilities", "=" * 40]
+    lines.extend(f"    • {file_type:20} - {signature}" for file_type, signature in CARVING_CAPABILITIES)
+    sys.stdout.write("\n".join(lines) + "\n")
 
 def show_partition_analysis():
     """Show partition analysis capabilities"""
     try:
         import psutil
         
-        print("💾 Partition Analysis")
-        print("=" * 40)
+        lines = ["💾 Partition Analysis", "=" * 40]
         
         partitions = psutil.disk_partitions()
-        for partition in partitions:
+        if not partitions:
+            sys.stdout.write("\n".join(lines) + "\n")
+            return
+        
+        # statvfs every mount at once; a hung network mount then costs one timeout, not the whole list.
+        # Daemon threads rather than an executor, whose workers are joined at exit: a thread still stuck
+        # in statvfs must not hold up leaving the program
+        results = [None] * len(partitions)
+        
+        def probe(index, mountpoint):
             try:
-                usage = psutil.disk_usage(partition.mountpoint)
-                print(f"    • {partition.device:20} - {partition.fstype:8} - {usage.percent:3}% used")
-            except PermissionError:
-                print(f"    • {partition.device:20} - {partition.fstype:8} - [Access Denied]")
+                results[index] = psutil.disk_usage(mountpoint)
+            except Exception as e:
+                results[index] = e
+        
+        threads = [
+            threading.Thread(target=probe, args=(index, partition.mountpoint), daemon=True)
+            for index, partition in enumerate(partitions)
+        ]
+        for thread in threads:
+            thread.start()
+        
+        deadline = time.monotonic() + PARTITION_USAGE_TIMEOUT
+        for index, (partition, thread) in enumerate(zip(partitions, threads)):
+            thread.join(timeout=max(0, deadline - time.monotonic()))
+            usage = results[index]
+            if thread.is_alive():
+                lines.append(f"    • {partition.device:20} - {partition.fstype:8} - [Not Responding]")
+            elif isinstance(usage, PermissionError):
+                lines.append(f"    • {partition.device:20} - {partition.fstype:8} - [Access Denied]")
+            elif isinstance(usage, Exception):
+                raise usage
+            else:
+                lines.append(f"    • {partition.device:20} - {partition.fstype:8} - {usage.percent:3}% used")
+        
+        # The whole table in one write
+        sys.stdout.write("\n".join(lines) + "\n")
                 
     except ImportError:
         print("❌ psutil not available for partition analysis")
@@ -0,0 +1,10 @@
+#!/usr/bin/env python3
+"""Shared rich console, built on first use"""
+
+from functools import lru_cache
+
+@lru_cache(maxsize=1)
+def get_console():
+    """Build the rich console on first use, so importing a module that prints doesn't load rich"""
+    from rich.console import Console
+    return Console()
@@ -2,13 +2,28 @@
 """Report generation for forensic operations"""
 
 import json
-import yaml
+from collections import Counter
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, Any
-from rich.console import Console
 
-console = Console()
+from utils.console import get_console
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _write_json(path: Path, report: Dict):
+    """Write a report as indented JSON, using orjson's native encoder when installed"""
+    if orjson is None:
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+        return
+    
+    # OPT_NON_STR_KEYS stringifies int keys the way json.dump does
+    with open(path, 'wb') as f:
+        f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
 
 class ReportGenerator:
     def __init__(self):
@@ -39,13 +54,12 @@ class ReportGenerator:
             'summary': self._generate_summary(scan_results)
         }
         
-        with open(report_path, 'w') as f:
-            json.dump(report, f, indent=2)
+        _write_json(report_path, report)
         
-        console.print(f"[green]📊 Report saved: {report_path}[/green]")
+        get_console().print(f"[green]📊 Report saved: {report_path}[/green]")
         return str(report_path)
     
-    def generate_forensic_report(self, forensic_results: Dict, output_dir: str) -> str:
+    def generate_forensic_report(self, forensic_results: Dict, output_dir: str, emit_yaml: bool = False) -> str:
         """Generate comprehensive forensic report"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         report_path = self.report_dir / f"forensic_report_{timestamp}.json"
@@ -63,29 +77,27 @@ class ReportGenerator:
             'recommendations': self._generate_recommendations(forensic_results)
         }
         
-        with open(report_path, 'w') as f:
-            json.dump(report, f, indent=2)
+        _write_json(report_path, report)
         
-        # Also generate YAML version
-        yaml_path = report_path.with_suffix('.yaml')
-        with open(yaml_path, 'w') as f:
-            yaml.dump(report, f, default_flow_style=False)
+        get_console().print(f"[green]📋 Reports saved:[/green]")
+        get_console().print(f"  JSON: [cyan]{report_path}[/cyan]")
         
-        console.print(f"[green]📋 Reports saved:[/green]")
-        console.print(f"  JSON: [cyan]{report_path}[/cyan]")
-        console.print(f"  YAML: [cyan]{yaml_path}[/cyan]")
+        # YAML version only on request
+        if emit_yaml:
+            import yaml
+            
+            # libyaml's C emitter when PyYAML was built with it
+            dumper = getattr(yaml, 'CDumper', yaml.Dumper)
+            yaml_path = report_path.with_suffix('.yaml')
+            with open(yaml_path, 'w') as f:
+                yaml.dump(report, f, Dumper=dumper, default_flow_style=False)
+            get_console().print(f"  YAML: [cyan]{yaml_path}[/cyan]")
         
         return str(report_path)
     
     def _generate_summary(self, scan_results: Dict) -> Dict:
         """Generate summary from scan results"""
-        file_types = {}
-        
-        for file_info in scan_results['files_found']:
-            file_type = file_info['type']
-            if file_type not in file_types:
-                file_types[file_type] = 0
-            file_types[file_type] += 1
+        file_types = dict(Counter(file_info['type'] for file_info in scan_results['files_found']))
         
         return {
             'file_type_breakdown': file_types,
@@ -144,10 +156,12 @@ class ReportGenerator:
     def display_report_summary(self, report_path: str):
         """Display a summary of the report"""
         try:
+            from rich.panel import Panel
+            
             with open(report_path, 'r') as f:
                 report = json.load(f)
             
-            console.print(Panel.fit(
+            get_console().print(Panel.fit(
                 f"[bold cyan]📋 Report Summary[/bold cyan]\n\n"
                 f"Tool: [white]{report['metadata']['tool']}[/white]\n"
                 f"Scan Type: [white]{report['metadata']['scan_type']}[/white]\n"
@@ -157,4 +171,4 @@ class ReportGenerator:
             ))
             
         except Exception as e:
-            console.print(f"[red]Error reading report: {e}[/red]")
+            get_console().print(f"[red]Error reading report: {e}[/red]")
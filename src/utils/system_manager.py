@@ -1,21 +1,45 @@
 #!/usr/bin/env python3
 """System management and monitoring utilities"""
 
+import hashlib
+import importlib.util
 import platform
-import psutil
+import shutil
 import sys
 import os
-from typing import Dict
-from rich.console import Console
+from functools import lru_cache
+from typing import Dict, Optional
 
-console = Console()
+from utils.console import get_console
+
+@lru_cache(maxsize=None)
+def _platform_info() -> Dict:
+    """Platform details, which are fixed for the life of the process"""
+    return {
+        'system': platform.system(),
+        'release': platform.release(),
+        'version': platform.version(),
+        'machine': platform.machine()
+    }
 
 class SystemManager:
+    _essential_tools_result: Optional[Dict] = None
+    
+    @property
+    def console(self):
+        """Shared rich console, created on first use"""
+        return get_console()
+    
     def __init__(self):
-        self.console = console
+        import psutil
+        
+        # Start the CPU sampling window so later cpu_percent(None) calls return at once
+        psutil.cpu_percent(interval=None)
     
     def get_detailed_system_info(self) -> Dict:
         """Get comprehensive system information"""
+        import psutil
+        
         try:
             # Memory information
             memory = psutil.virtual_memory()
@@ -29,10 +53,11 @@ class SystemManager:
             cpu_threads = psutil.cpu_count(logical=True)
             
             # System information
+            platform_info = _platform_info()
             system_info = {
-                'os': f"{platform.system()} {platform.release()}",
-                'kernel': platform.version(),
-                'architecture': platform.machine(),
+                'os': f"{platform_info['system']} {platform_info['release']}",
+                'kernel': platform_info['version'],
+                'architecture': platform_info['machine'],
                 'python_version': f"{sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}",
                 'ram_gb': round(memory.total / (1024 ** 3), 2),
                 'ram_used_gb': round(memory.used / (1024 ** 3), 2),
@@ -44,7 +69,7 @@ class SystemManager:
                 'free_disk_gb': round(disk.free / (1024 ** 3), 2),
                 'cpu_cores': cpu_cores,
                 'cpu_threads': cpu_threads,
-                'cpu_usage': psutil.cpu_percent(interval=1),
+                'cpu_usage': psutil.cpu_percent(interval=None),
                 'load_average': os.getloadavg() if hasattr(os, 'getloadavg') else 'N/A'
             }
             
@@ -60,7 +85,8 @@ class SystemManager:
             'disk_space': self._check_disk_space(),
             'memory_available': self._check_memory(),
             'essential_tools': self._check_essential_tools(),
-            'python_dependencies': self._check_python_deps()
+            'python_dependencies': self._check_python_deps(),
+            'hash_backend': self._check_hash_backend()
         }
         
         return checks
@@ -78,6 +104,8 @@ class SystemManager:
     
     def _check_disk_space(self) -> Dict:
         """Check available disk space"""
+        import psutil
+        
         try:
             disk = psutil.disk_usage('/')
             free_gb = disk.free / (1024 ** 3)
@@ -94,6 +122,8 @@ class SystemManager:
     
     def _check_memory(self) -> Dict:
         """Check available memory"""
+        import psutil
+        
         try:
             memory = psutil.virtual_memory()
             free_gb = memory.available / (1024 ** 3)
@@ -110,36 +140,34 @@ class SystemManager:
     
     def _check_essential_tools(self) -> Dict:
         """Check essential command line tools"""
+        # Installed tools don't change mid-process, so the lookup is shared by every instance
+        if SystemManager._essential_tools_result is not None:
+            return SystemManager._essential_tools_result
+        
         essential_tools = ['file', 'dd', 'lsblk']
-        available = []
-        missing = []
         
-        for tool in essential_tools:
-            try:
-                subprocess.run([tool, '--version'], capture_output=True, check=True)
-                available.append(tool)
-            except:
-                missing.append(tool)
+        missing = [tool for tool in essential_tools if shutil.which(tool) is None]
         
         if not missing:
-            return {'status': 'PASS', 'message': 'All essential tools available'}
+            result = {'status': 'PASS', 'message': 'All essential tools available'}
         else:
-            return {
+            result = {
                 'status': 'WARNING', 
                 'message': f'Missing tools: {", ".join(missing)}'
             }
+        SystemManager._essential_tools_result = result
+        return result
     
     def _check_python_deps(self) -> Dict:
         """Check Python dependencies"""
-        deps_to_check = ['psutil', 'rich', 'questionary', 'magic']
+        deps_to_check = ['psutil', 'rich', 'questionary']
         available = []
         missing = []
         
         for dep in deps_to_check:
-            try:
-                __import__(dep)
+            if importlib.util.find_spec(dep) is not None:
                 available.append(dep)
-            except ImportError:
+            else:
                 missing.append(dep)
         
         if not missing:
@@ -149,3 +177,16 @@ class SystemManager:
                 'status': 'FAIL',
                 'message': f'Missing dependencies: {", ".join(missing)}'
             }
+    
+    def _check_hash_backend(self) -> Dict:
+        """Check that SHA-256 hashing runs on OpenSSL"""
+        # hashlib routes to OpenSSL's EVP code (SHA-NI/AVX2 where the CPU has them) only when
+        # CPython was built against it; otherwise carved-file hashing uses the slow builtin
+        if getattr(hashlib.sha256, '__name__', '') == 'openssl_sha256':
+            import ssl
+            return {'status': 'PASS', 'message': f'SHA-256 via {ssl.OPENSSL_VERSION}'}
+        
+        return {
+            'status': 'WARNING',
+            'message': 'SHA-256 uses the builtin implementation (no OpenSSL acceleration)'
+        }
@@ -6,8 +6,45 @@ import random
 from pathlib import Path
 from rich.console import Console
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 console = Console()
 
+# Signature plus content for each file in the basic test image
+TEST_IMAGE_FILES = (
+    b'\xFF\xD8\xFF\xE0' + b'JPEG' * 100,  # JPEG
+    b'\x89\x50\x4E\x47' + b'PNG_' * 100,   # PNG
+    b'\x25\x50\x44\x46' + b'PDF_' * 100,   # PDF
+    b'\x50\x4B\x03\x04' + b'ZIP_' * 100,   # ZIP
+    b'\x49\x44\x33' + b'MP3_' * 100,       # MP3
+    b'\x52\x61\x72\x21' + b'RAR_' * 100,   # RAR
+)
+
+# Signatures placed at random positions in the simple test images
+SIMPLE_IMAGE_SIGNATURES = (
+    b'\xFF\xD8\xFF\xE0',  # JPEG
+    b'\x89\x50\x4E\x47',   # PNG
+    b'\x25\x50\x44\x46',   # PDF
+)
+
+# Complex test image files in sequence: signature, content pattern, size
+COMPLEX_IMAGE_FILES = (
+    (b'\xFF\xD8\xFF\xE0', b'JPEG_DATA', 50 * 1024),  # JPEG - 50KB
+    (b'\x89\x50\x4E\x47', b'PNG_DATA_', 100 * 1024), # PNG - 100KB
+    (b'\x25\x50\x44\x46', b'PDF_CONTENT', 200 * 1024), # PDF - 200KB
+    (b'\x50\x4B\x03\x04', b'ZIP_ARCHIVE', 150 * 1024), # ZIP - 150KB
+    (b'\x52\x61\x72\x21', b'RAR_FILE__', 80 * 1024),  # RAR - 80KB
+)
+
+def _filler_bytes(size: int) -> bytes:
+    """Random filler for synthetic images; it needs no cryptographic strength, only speed"""
+    if np is not None:
+        return np.random.default_rng().bytes(size)
+    return os.urandom(size)
+
 class TestEnvironment:
     def __init__(self):
         self.test_dir = Path("test_data")
@@ -17,25 +54,21 @@ class TestEnvironment:
         """Create a test disk image with various file signatures"""
         test_path = self.test_dir / "forensic_test.img"
         
-        # Create a mix of file signatures and random data
-        signatures = [
-            b'\xFF\xD8\xFF\xE0' + b'JPEG' * 100,  # JPEG
-            b'\x89\x50\x4E\x47' + b'PNG_' * 100,   # PNG
-            b'\x25\x50\x44\x46' + b'PDF_' * 100,   # PDF
-            b'\x50\x4B\x03\x04' + b'ZIP_' * 100,   # ZIP
-            b'\x49\x44\x33' + b'MP3_' * 100,       # MP3
-            b'\x52\x61\x72\x21' + b'RAR_' * 100,   # RAR
-        ]
+        # Random data around each signature, sliced from one pool generated up front
+        gap_sizes = [(random.randint(100, 1000), random.randint(500, 2000)) for _ in TEST_IMAGE_FILES]
+        pool = memoryview(_filler_bytes(sum(before + after for before, after in gap_sizes)))
+        offset = 0
         
-        # Add some random data between signatures
         with open(test_path, 'wb') as f:
-            for i, signature in enumerate(signatures):
+            for signature, (before, after) in zip(TEST_IMAGE_FILES, gap_sizes):
                 # Add random data before signature
-                f.write(os.urandom(random.randint(100, 1000)))
+                f.write(pool[offset:offset + before])
+                offset += before
                 # Add the file signature
                 f.write(signature)
                 # Add more random data
-                f.write(os.urandom(random.randint(500, 2000)))
+                f.write(pool[offset:offset + after])
+                offset += after
             
             console.print(f"[green]✅ Created test image: {test_path}[/green]")
             console.print(f"[dim]Size: {test_path.stat().st_size} bytes[/dim]")
@@ -75,37 +108,26 @@ class TestEnvironment:
     def _create_simple_test_image(self, path: Path, size: int):
         """Create a simple test image with basic signatures"""
         with open(path, 'wb') as f:
-            # Write some file signatures at random positions
-            signatures = [
-                b'\xFF\xD8\xFF\xE0',  # JPEG
-                b'\x89\x50\x4E\x47',   # PNG
-                b'\x25\x50\x44\x46',   # PDF
-            ]
-            
-            data = bytearray(size)
+            # Size the file without writing its zeros: the filesystem leaves holes that read back as zero
+            f.truncate(size)
             
             # Insert signatures at random positions
-            for signature in signatures:
+            for signature in SIMPLE_IMAGE_SIGNATURES:
                 pos = random.randint(0, size - len(signature) - 1)
-                data[pos:pos+len(signature)] = signature
-            
-            f.write(data)
+                f.seek(pos)
+                f.write(signature)
     
     def _create_complex_test_image(self, path: Path, size: int):
         """Create a complex test image with multiple file types"""
-        with open(path, 'wb') as f:
+        with open(path, 'wb', buffering=1024 * 1024) as f:
             current_pos = 0
             
-            # Add different file types in sequence
-            file_structures = [
-                (b'\xFF\xD8\xFF\xE0', b'JPEG_DATA', 50 * 1024),  # JPEG - 50KB
-                (b'\x89\x50\x4E\x47', b'PNG_DATA_', 100 * 1024), # PNG - 100KB
-                (b'\x25\x50\x44\x46', b'PDF_CONTENT', 200 * 1024), # PDF - 200KB
-                (b'\x50\x4B\x03\x04', b'ZIP_ARCHIVE', 150 * 1024), # ZIP - 150KB
-                (b'\x52\x61\x72\x21', b'RAR_FILE__', 80 * 1024),  # RAR - 80KB
-            ]
+            # Gaps between files are sliced from one random pool generated up front
+            gap_sizes = [random.randint(1024, 10 * 1024) for _ in COMPLEX_IMAGE_FILES]
+            gap_pool = memoryview(_filler_bytes(sum(gap_sizes)))
+            gap_offset = 0
             
-            for signature, pattern, file_size in file_structures:
+            for (signature, pattern, file_size), gap_size in zip(COMPLEX_IMAGE_FILES, gap_sizes):
                 if current_pos + file_size > size:
                     break
                     
@@ -113,24 +135,23 @@ class TestEnvironment:
                 f.write(signature)
                 current_pos += len(signature)
                 
-                # Write file content pattern
-                pattern_repeats = file_size // len(pattern)
-                for _ in range(pattern_repeats):
-                    if current_pos + len(pattern) > size:
-                        break
-                    f.write(pattern)
-                    current_pos += len(pattern)
+                # Write file content pattern in one bulk write, clamped to the image size
+                pattern_repeats = min(file_size, size - current_pos) // len(pattern)
+                f.write(pattern * pattern_repeats)
+                current_pos += len(pattern) * pattern_repeats
                 
                 # Add some random data between files
-                gap_size = random.randint(1024, 10 * 1024)
                 if current_pos + gap_size < size:
-                    f.write(os.urandom(gap_size))
+                    f.write(gap_pool[gap_offset:gap_offset + gap_size])
+                    gap_offset += gap_size
                     current_pos += gap_size
             
-            # Fill remaining space with random data
+            # Fill remaining space with random data, a block at a time to keep memory flat
             remaining = size - current_pos
-            if remaining > 0:
-                f.write(os.urandom(remaining))
+            while remaining > 0:
+                block = min(remaining, 1024 * 1024)
+                f.write(_filler_bytes(block))
+                remaining -= block
     
     def cleanup_test_environment(self):
         """Clean up test files"""